@@ -1,6 +1,9 @@
-import os, json, requests
+import os, json, asyncio, hashlib, random
 from datetime import datetime
 from pathlib import Path
+import httpx
+import orjson
+import numpy as np
 import pandas as pd
 
 START_YEAR = 2006
@@ -25,74 +28,155 @@ SERIES = {
 
 BLS_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
 DATA_DIR = Path("data")
-CSV_PATH = DATA_DIR / "bls_timeseries.csv"
+PARQUET_PATH = DATA_DIR / "bls_timeseries.parquet"
+LEGACY_CSV_PATH = DATA_DIR / "bls_timeseries.csv"  # pre-Parquet store, migrated on first run
 META_PATH = DATA_DIR / "meta.json"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Shared column dtypes so per-series frames and the stored history concat via the fast block-copy path
+COLUMNS = ["series_id", "date", "value"]
+DTYPES = {"series_id": pd.CategoricalDtype(list(SERIES)), "date": "datetime64[ns]", "value": "float32"}
+
+# Connection pool shared by all per-series requests; keep-alive avoids a TLS handshake per series
+POOL_LIMITS = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+CONNECT_RETRIES = 3
+MAX_ATTEMPTS = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Revision windows: every run rechecks the last 24 months (monthly revisions, most of the CES benchmark);
+# January/February runs reach further back for the CES benchmark and CPS seasonal-factor revisions.
+REVISION_MONTHS = 24
+ANNUAL_REVISION_YEARS = 5
+ANNUAL_REVISION_MONTHS = (1, 2)
+MAX_CONCURRENCY = 4  # in-flight BLS requests; keeps the per-series fan-out under per-host limits
+
 class BLSError(Exception): pass
 
-def fetch_bls_timeseries(series_ids, start_year, end_year):
+def _payload(series_ids, start_year, end_year):
     payload = {"seriesid": series_ids, "startyear": str(start_year), "endyear": str(end_year)}
     key = os.getenv("BLS_API_KEY")
     if key:
         payload["registrationkey"] = key
-    r = requests.post(BLS_URL, json=payload, timeout=60)
+    return payload
+
+def _retry_delay(r, attempt):
+    retry_after = r.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return 2 ** attempt + random.random()
+
+async def _fetch_one(client, sem, sid, start_year, end_year):
+    # Backoff sleeps hold the slot, so a 429 also throttles the series queued behind it
+    async with sem:
+        for attempt in range(MAX_ATTEMPTS):
+            r = await client.post(BLS_URL, json=_payload([sid], start_year, end_year))
+            if r.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                break
+            await asyncio.sleep(_retry_delay(r, attempt))
     if r.status_code != 200:
-        raise BLSError(f"HTTP {r.status_code}: {r.text[:200]}")
-    data = r.json()
+        raise BLSError(f"HTTP {r.status_code} for {sid}: {r.text[:200]}")
+    data = orjson.loads(r.content)
     if data.get("status") != "REQUEST_SUCCEEDED":
-        raise BLSError(f"BLS error: {json.dumps(data)[:300]}")
-    return data
-
-def _q_to_month(q: int) -> int:
-    return {1: 3, 2: 6, 3: 9, 4: 12}[q]
-
-def series_payload_to_rows(series_json):
-    sid = series_json["seriesID"]
-    rows = []
-    for item in series_json["data"]:
-        p = item.get("period")
-        if not p or p == "M13":
-            continue
-        year = int(item["year"])
-        if p.startswith("M"):
-            month = int(p[1:])
-        elif p.startswith("Q"):
-            month = _q_to_month(int(p[1:]))
-        else:
-            continue
-        dt = pd.Timestamp(year=year, month=month, day=1)
-        val = float(item["value"])
-        rows.append({"series_id": sid, "date": dt, "value": val})
-    return rows
+        raise BLSError(f"BLS error for {sid}: {json.dumps(data)[:300]}")
+    return data["Results"]["series"]
+
+async def _fetch_all(start_years, end_year):
+    # One request per series (each from its own start year), issued concurrently over a shared, pooled client
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=POOL_LIMITS, retries=CONNECT_RETRIES)
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with httpx.AsyncClient(transport=transport, timeout=60.0) as client:
+        results = await asyncio.gather(*[_fetch_one(client, sem, sid, start, end_year) for sid, start in start_years.items()])
+    return [s for series in results for s in series]
+
+def fetch_bls_timeseries(start_years, end_year):
+    return asyncio.run(_fetch_all(start_years, end_year))
+
+def series_payload_to_df(series_json):
+    df = pd.DataFrame(series_json["data"], columns=["year", "period", "value"])
+    period = df["period"].fillna("")
+    df = df[period.str.match(r"M(0[1-9]|1[0-2])$|Q0[1-4]$")]  # excludes M13 (annual average)
+    # Only Mnn/Qn periods remain, so quarter-end months are just Q * 3
+    num = df["period"].str[1:].astype("int8")
+    month = np.where(df["period"].str.startswith("Q"), num * 3, num)
+    # Months since the epoch -> datetime64[M]: first-of-month dates with no per-row parsing
+    months = (df["year"].astype(int).to_numpy() - 1970) * 12 + (month - 1)
+    return pd.DataFrame({
+        "series_id": series_json["seriesID"],
+        "date": months.astype("datetime64[M]"),
+        "value": pd.to_numeric(df["value"], errors="coerce"),
+    }).astype(DTYPES)
 
 def load_existing():
-    if CSV_PATH.exists():
-        return pd.read_csv(CSV_PATH, parse_dates=["date"])
-    return pd.DataFrame(columns=["series_id", "date", "value"])
+    if PARQUET_PATH.exists():
+        return pd.read_parquet(PARQUET_PATH).astype(DTYPES)
+    if LEGACY_CSV_PATH.exists():
+        return pd.read_csv(LEGACY_CSV_PATH, engine="pyarrow", parse_dates=["date"]).astype(DTYPES)
+    return pd.DataFrame(columns=COLUMNS).astype(DTYPES)
 
 def union_and_dedupe(df_old, df_new):
     df = pd.concat([df_old, df_new], ignore_index=True)
-    df = df.drop_duplicates(subset=["series_id", "date"], keep="last")
-    return df.sort_values(["series_id", "date"]).reset_index(drop=True)
+    # Newly fetched rows come last, so last() keeps them; grouping also yields the sorted order
+    return df.groupby(["series_id", "date"], sort=True, as_index=False, observed=True).last()
+
+def load_meta():
+    if META_PATH.exists():
+        return json.loads(META_PATH.read_text())
+    return {}
+
+def value_hash(d):
+    rows = d[["date", "value"]].sort_values("date")
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+def revision_start_year(last_date):
+    return max(START_YEAR, (pd.Timestamp(last_date) - pd.DateOffset(months=REVISION_MONTHS)).year)
+
+def series_state(d):
+    """Last observed month and a hash of the rows the next run refetches (from revision_start_year on)."""
+    last = d["date"].max()
+    window = d[d["date"].dt.year >= revision_start_year(last)]
+    return {"last_date": last.strftime("%Y-%m"), "value_hash": value_hash(window)}
+
+def series_start_years(df_old, states):
+    last_dates = df_old.groupby("series_id", observed=True)["date"].max()
+    starts = {}
+    for sid in SERIES:
+        if sid in states:
+            starts[sid] = revision_start_year(states[sid]["last_date"])
+        elif sid in last_dates.index:
+            starts[sid] = revision_start_year(last_dates[sid])
+        else:
+            starts[sid] = START_YEAR
+    if datetime.utcnow().month in ANNUAL_REVISION_MONTHS:
+        # The wider window hashes differently from the stored 24-month one, so these runs always merge
+        floor = max(START_YEAR, END_YEAR - ANNUAL_REVISION_YEARS)
+        starts = {sid: min(start, floor) for sid, start in starts.items()}
+    return starts
 
 def run_full_or_incremental():
     df_old = load_existing()
-    if df_old.empty:
-        start = START_YEAR
-    else:
-        last_date = df_old["date"].max()
-        start = max(START_YEAR, (last_date - pd.DateOffset(months=24)).year)  # backfill window for revisions
-
-    api = fetch_bls_timeseries(list(SERIES.keys()), start, END_YEAR)
-    rows = [r for s in api["Results"]["series"] for r in series_payload_to_rows(s)]
-    df_new = pd.DataFrame(rows)
-    df_out = union_and_dedupe(df_old, df_new)
-
-    CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df_out.to_csv(CSV_PATH, index=False)
-    META_PATH.write_text(json.dumps({"last_updated_utc": datetime.utcnow().isoformat()}, indent=2))
-    print(f"Updated {len(df_out)} rows → {CSV_PATH}")
+    states = load_meta().get("series", {}) if not df_old.empty else {}
+
+    series = fetch_bls_timeseries(series_start_years(df_old, states), END_YEAR)
+    frames = []
+    for s in series:
+        d = series_payload_to_df(s)
+        sid = s["seriesID"]
+        if d.empty:
+            continue
+        if sid in states and value_hash(d) == states[sid]["value_hash"]:
+            continue  # no new release and no revisions for this series
+        states[sid] = series_state(d)
+        frames.append(d)
+
+    df_out = df_old
+    if frames:
+        df_out = union_and_dedupe(df_old, pd.concat(frames, ignore_index=True))
+    PARQUET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Parquet can't be appended to, so rewrite only when some series changed
+    if frames or not PARQUET_PATH.exists():
+        df_out.to_parquet(PARQUET_PATH, compression="zstd", index=False)
+    meta = {"last_updated_utc": datetime.utcnow().isoformat(), "series": states}
+    META_PATH.write_text(json.dumps(meta, indent=2))
+    print(f"Updated {len(frames)} of {len(SERIES)} series, {len(df_out)} rows → {PARQUET_PATH}")
     return df_out
 
 if __name__ == "__main__":
@@ -6,7 +6,8 @@ import plotly.express as px
 from datetime import datetime
 
 DATA_DIR = Path("data")
-CSV_PATH = DATA_DIR / "bls_timeseries.csv"
+PARQUET_PATH = DATA_DIR / "bls_timeseries.parquet"
+LEGACY_CSV_PATH = DATA_DIR / "bls_timeseries.csv"  # read until the fetcher migrates it to Parquet
 META_PATH = DATA_DIR / "meta.json"
 
 SERIES = {
@@ -22,6 +23,8 @@ SERIES = {
 }
 
 SECTIONS = ["Employment", "Productivity", "Price Index", "Compensation"]
+SECTION_TO_SIDS = {sec: tuple(sid for sid, m in SERIES.items() if m["section"] == sec) for sec in SECTIONS}
+YOY_SERIES = ["CUUR0000SA0", "CES0500000003", "CIU1010000000000I"]
 
 # NBER recession shading since 2006 (approximate monthly ranges)
 RECESSIONS = [
@@ -29,26 +32,79 @@ RECESSIONS = [
     (pd.Timestamp(2020, 2, 1), pd.Timestamp(2020, 4, 1)),
 ]
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv(CSV_PATH, parse_dates=["date"])
-    df["series_id"] = df["series_id"].astype("string")
-    return df
+def _data_path():
+    return PARQUET_PATH if PARQUET_PATH.exists() else LEGACY_CSV_PATH
+
+def _data_version():
+    path = _data_path()
+    return path.name, path.stat().st_mtime_ns
+
+@st.cache_data(max_entries=1)
+def load_data(version):
+    # `version` is the data file's name + mtime: the cache refreshes exactly when the Action rewrites it
+    path = _data_path()
+    if path == PARQUET_PATH:
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, engine="pyarrow", parse_dates=["date"])
+    df["series_id"] = df["series_id"].astype("category")
+    df["value"] = pd.to_numeric(df["value"], downcast="float")
+    # Sorted (series_id, date) index: per-series slices are index lookups, already in date order
+    return df.sort_values(["series_id", "date"]).set_index(["series_id", "date"])
 
 def yoy_from_level(df, sid):
     freq = SERIES.get(sid, {}).get("freq", "M").upper()
     lag = 4 if freq.startswith("Q") else 12
-    d = df[df.series_id == sid][["date", "value"]].sort_values("date").set_index("date").copy()
+    d = df.xs(sid, level="series_id")[["value"]].copy()
     d["YoY %"] = d["value"].pct_change(lag) * 100.0
     d = d.reset_index()
     d["series_id"] = sid
     return d
 
+@st.cache_data(max_entries=len(YOY_SERIES))
+def yoy_cached(sid, version):
+    # YoY over the full history, recomputed only when the data version changes
+    return yoy_from_level(load_data(version), sid)
+
+def year_bounds(year_min, year_max):
+    return pd.Timestamp(year=year_min, month=1, day=1), pd.Timestamp(year=year_max, month=12, day=31)
+
+def filter_data(df, pick, year_min, year_max):
+    df = df[df.index.get_level_values("series_id").isin(pick)]
+    lo, hi = year_bounds(year_min, year_max)
+    return df.loc[(slice(None), slice(lo, hi)), :]
+
+@st.cache_data(max_entries=1)
+def full_csv_bytes(version):
+    return load_data(version).to_csv().encode("utf-8")
+
+@st.cache_data(max_entries=8)
+def to_csv_bytes(series_tuple, year_min, year_max, version):
+    # Serialized only when the filters (or the data file) change, not on every rerun
+    return filter_data(load_data(version), series_tuple, year_min, year_max).to_csv().encode("utf-8")
+
 def add_recession_shading(fig):
     for (start, end) in RECESSIONS:
         fig.add_vrect(x0=start, x1=end, fillcolor="gray", opacity=0.15, line_width=0)
     return fig
 
+def faceted_line(d, y, sub_ids, title):
+    # One figure per section (a facet row per series) instead of one figure per series.
+    # Rows are labelled by the short series_id; the full names go in the legend.
+    ids = d["series_id"].astype(str)
+    d = d.assign(series_id=ids, name=ids.map(lambda sid: SERIES[sid]["name"]))
+    present = set(ids)
+    order = [sid for sid in sub_ids if sid in present]
+    fig = px.line(
+        d, x="date", y=y, color="name", facet_row="series_id", title=title,
+        category_orders={"series_id": order, "name": [SERIES[sid]["name"] for sid in order]},
+        height=250 * len(order), labels={"value": "Value", "date": "Date", "name": "Series"},
+    )
+    fig.update_yaxes(matches=None)  # series have different units
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=", 1)[-1]))
+    fig.update_layout(showlegend=True)
+    return add_recession_shading(fig)
+
 def main():
     st.set_page_config(page_title="US Labor Dashboard", layout="wide")
     st.title("US Labor Dashboard")
@@ -56,7 +112,7 @@ def main():
 
     with st.expander("About & rubric alignment", expanded=False):
         st.markdown(
-            "- Uses BLS Public API via monthly/quarterly fetcher (stored to CSV; no live fetch on every app load).\n"
+            "- Uses BLS Public API via monthly/quarterly fetcher (stored to Parquet; no live fetch on every app load).\n"
             "- Includes required series: Nonfarm Employment & Unemployment Rate; plus additional sections from proposal.\n"
             "- Updates via GitHub Actions twice monthly to catch major releases.\n"
             "- Filter by section/series and date range; optional YoY visuals for CPI, Wages, ECI index."
@@ -68,7 +124,7 @@ def main():
 
     # Sidebar filters
     section = st.sidebar.multiselect("Sections", SECTIONS, default=SECTIONS)
-    eligible = [sid for sid, m in SERIES.items() if m["section"] in section]
+    eligible = [sid for sec in section for sid in SECTION_TO_SIDS[sec]]
     pick = st.sidebar.multiselect(
         "Series",
         eligible,
@@ -77,38 +133,40 @@ def main():
     )
     year_min, year_max = st.sidebar.slider("Year range", 2006, datetime.utcnow().year, (2006, datetime.utcnow().year))
 
-    if not CSV_PATH.exists():
+    if not _data_path().exists():
         st.error("Data file not found. Run bls_update.py first (or wait for GitHub Actions to populate it).")
         return
-    df = load_data()
-    df = df[df["series_id"].isin(pick)]
-    df = df[(df["date"].dt.year >= year_min) & (df["date"].dt.year <= year_max)]
+    version = _data_version()
+    df = filter_data(load_data(version), pick, year_min, year_max)
+    lo, hi = year_bounds(year_min, year_max)
 
     # Download buttons
-    st.download_button("Download full CSV", CSV_PATH.read_bytes(), file_name="bls_timeseries.csv")
-    st.download_button("Download filtered CSV", df.to_csv(index=False).encode("utf-8"), file_name="bls_timeseries_filtered.csv")
+    st.download_button("Download full CSV", full_csv_bytes(version), file_name="bls_timeseries.csv")
+    st.download_button(
+        "Download filtered CSV",
+        to_csv_bytes(tuple(sorted(pick)), year_min, year_max, version),
+        file_name="bls_timeseries_filtered.csv",
+    )
 
     # Sectioned charts
+    pick_set = set(pick)
     for sec in SECTIONS:
-        sub_ids = [sid for sid in pick if SERIES[sid]["section"] == sec]
+        sub_ids = [sid for sid in SECTION_TO_SIDS[sec] if sid in pick_set]
         if not sub_ids:
             continue
         st.subheader(sec)
-        for sid in sub_ids:
-            name = SERIES[sid]["name"]
-            d = df[df.series_id == sid].sort_values("date")
-            if d.empty:
-                continue
-            fig = px.line(d, x="date", y="value", title=name, labels={"value": "Value", "date": "Date"})
-            fig = add_recession_shading(fig)
-            st.plotly_chart(fig, use_container_width=True)
-
-            if sid in ["CUUR0000SA0", "CES0500000003", "CIU1010000000000I"]:
-                yoy = yoy_from_level(df, sid).dropna()
-                if not yoy.empty:
-                    fig2 = px.line(yoy, x="date", y="YoY %", title=f"{name} — YoY %")
-                    fig2 = add_recession_shading(fig2)
-                    st.plotly_chart(fig2, use_container_width=True)
+        d = df[df.index.get_level_values("series_id").isin(sub_ids)].reset_index()
+        if d.empty:
+            continue
+        st.plotly_chart(faceted_line(d, "value", sub_ids, sec), use_container_width=True)
+
+        present = set(d["series_id"].astype(str))
+        yoy_ids = [sid for sid in sub_ids if sid in YOY_SERIES and sid in present]
+        if yoy_ids:
+            yoy = pd.concat([yoy_cached(sid, version) for sid in yoy_ids], ignore_index=True)
+            yoy = yoy[(yoy.date >= lo) & (yoy.date <= hi)].dropna()
+            if not yoy.empty:
+                st.plotly_chart(faceted_line(yoy, "YoY %", yoy_ids, f"{sec} — YoY %"), use_container_width=True)
 
     st.write("---")
     st.caption("Notes: CPI is NSA; productivity series is Q/Q %; ECI shown as official YoY and YoY computed from the index.")